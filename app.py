@@ -1,22 +1,53 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import asyncio
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 import gspread
+from gspread.exceptions import APIError
 from google.oauth2.service_account import Credentials
+from google.auth.exceptions import RefreshError
 import os
+import re
+import sys
+import subprocess
 import json
+from urllib.parse import urlparse
+from collections import deque
+from html.parser import HTMLParser
+import time
+import atexit
+import threading
+from types import SimpleNamespace
 from typing import List, Optional, Callable, Awaitable, Any
+try: import uvloop # opcional: event loop libuv (não existe em Windows)
+except ImportError: uvloop = None
+try: import orjson # opcional: (de)serialização JSON mais rápida
+except ImportError: orjson = None
 
 # --- CONFIGURATION ---
 LINKS_FILE = "links.json"
+STORAGE_STATE_FILE = "storage_state.json" # cookies dos sites, para os contextos começarem "quentes" após reinício
+RESULT_CACHE_FILE = "result_cache.json" # resultados definitivos, reaproveitados após reinício
 GLOBAL_DEFAULT_URL = "https://docs.google.com/spreadsheets/d/1LDOJUHEt1xrXnNcrK9O9z5P44amrVuXCkeAse-YLT0E"
 
+def read_json(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def write_json(path, obj):
+    data = orjson.dumps(obj) if orjson else json.dumps(obj).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
+def try_write_json(path, obj):
+    try: write_json(path, obj)
+    except OSError: pass # deploy só de leitura: fica apenas a cópia em memória
+
 def load_links():
     if os.path.exists(LINKS_FILE):
-        try:
-            with open(LINKS_FILE, "r") as f:
-                return json.load(f)
+        try: return read_json(LINKS_FILE)
         except: return {}
     return {}
 
@@ -25,11 +56,11 @@ def save_link(key, url):
     links[key] = url
     if not os.path.exists(os.path.dirname(LINKS_FILE)) and os.path.dirname(LINKS_FILE):
         os.makedirs(os.path.dirname(LINKS_FILE))
-    with open(LINKS_FILE, "w") as f:
-        json.dump(links, f)
+    write_json(LINKS_FILE, links)
 
 SIAC_URL = "https://www.siac.pt/pt"
 OLX_BASE_URL = "https://www.olx.pt/"
+OLX_API_OFFER_URL = "https://www.olx.pt/api/v1/offers/{}"
 RNT_AL_DIRECT_URL = "https://rnt.turismodeportugal.pt/RNT/RNAL.aspx?nr="
 RNT_ET_URL = "https://rnt.turismodeportugal.pt/RNT/Pesquisa_ET.aspx"
 
@@ -37,6 +68,28 @@ SIAC_TEXT_REGISTERED = "Animal com registo no SIAC"
 SIAC_TEXT_NOT_REGISTERED = "Animal sem registo"
 SIAC_TEXT_MISSING = "Animal com registo no SIAC e que se encontra desaparecido"
 
+BROWSER_ARGS = [
+    "--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage", "--disable-gpu", "--disable-blink-features=AutomationControlled",
+    # Headless scraping: no extensions, sync, translate UI or background traffic; images are never decoded
+    "--disable-extensions", "--disable-background-networking", "--disable-sync", "--disable-default-apps",
+    "--disable-features=TranslateUI", "--blink-settings=imagesEnabled=false",
+]
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+DEFAULT_CONCURRENCY = 4 # Páginas (BrowserContexts) a trabalhar em paralelo
+VIEWPORT = {"width": 1280, "height": 800}
+# Os scrapers só lêem texto: imagens, fontes e media não são descarregados.
+# CSS fica activo porque innerText depende dele para esconder elementos ocultos.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "texttrack", "manifest"}
+CACHED_RESOURCE_TYPES = {"script", "stylesheet"} # servidos de memória depois do primeiro pedido
+ASSET_CACHE_MAX_BYTES = 64 * 1024 * 1024
+ASSET_CACHE_TTL = 3600 # segundos
+# Nunca guardados na cache: os cookies de um contexto não podem passar para outro
+ASSET_COOKIE_HEADERS = {"set-cookie", "set-cookie2"}
+# Analytics/ads que as páginas carregam mas que nenhum scraper lê
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com", "googleadservices.com", "facebook.net", "facebook.com", "hotjar.com", "criteo.com", "criteo.net", "scorecardresearch.com", "onetrust.com", "cookielaw.org", "clarity.ms", "adnxs.com", "rubiconproject.com", "pubmatic.com", "casalemedia.com", "taboola.com")
+# Navegações por segundo por host (abaixo do limite a partir do qual aparecem captchas/429)
+HOST_RATE_LIMITS = {"olx.pt": 5, "rnt.turismodeportugal.pt": 3, "siac.pt": 2}
+
 # --- I18N SYSTEM ---
 TRANSLATIONS = {
     "PT": {
@@ -80,6 +133,10 @@ TRANSLATIONS = {
         "siac_not_registered": "❌ SEM REGISTO",
         "siac_missing": "🚩 DESAPARECIDO",
         "siac_unknown": "❓ Desconhecido",
+        "concurrency_label": "⚡ Páginas em paralelo",
+        "errors_label": "⚠️ Erros transitórios nesta execução ({})",
+        "btn_clear_cache": "🧹 Limpar cache de resultados",
+        "cache_cleared": "Cache de resultados limpa: tudo será verificado de novo.",
         "footer": "Validação Automática Multi-Project 2026"
     },
     "EN": {
@@ -123,12 +180,19 @@ TRANSLATIONS = {
         "siac_not_registered": "❌ Unregistered",
         "siac_missing": "🚩 Missing",
         "siac_unknown": "❓ Unknown",
+        "concurrency_label": "⚡ Parallel pages",
+        "errors_label": "⚠️ Transient errors in this run ({})",
+        "btn_clear_cache": "🧹 Clear result cache",
+        "cache_cleared": "Result cache cleared: everything will be checked again.",
         "footer": "Multi-Project Auto Validation 2026"
     }
 }
 
 if "lang" not in st.session_state: st.session_state.lang = "PT"
 
+# Col E (Carros) values cleared by btn_clear_mod, in both languages
+OLX_CLEANUP_LABELS = frozenset(TRANSLATIONS[lang][key] for lang in TRANSLATIONS for key in ("km_moderated", "km_inactive", "km_fixed"))
+
 def t(key, *args):
     text = TRANSLATIONS[st.session_state.lang].get(key, key)
     if args: return text.format(*args)
@@ -206,21 +270,30 @@ with st.sidebar:
     if url_gs:
         st.link_button(t("btn_open_sheet"), url_gs, use_container_width=True)
 
+    st.divider()
+    concurrency = st.slider(t("concurrency_label"), min_value=1, max_value=10, value=DEFAULT_CONCURRENCY)
+    clear_cache_clicked = st.button(t("btn_clear_cache"), key="btn_clear_cache", use_container_width=True) # handled once the cache exists (UI LOGIC)
+
 # --- SERVICES ---
 
+@st.cache_resource(show_spinner=False)
+def _authorize_gspread():
+    """Builds the authorized client once per process; failures are not cached."""
+    creds_dict = dict(st.secrets["gcp_service_account"])
+    if "\\n" in creds_dict["private_key"]:
+        creds_dict["private_key"] = creds_dict["private_key"].replace("\\n", "\n")
+    
+    scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+    return gspread.authorize(creds)
+
 def get_gspread_client():
     """Authenticates with Google Sheets using Streamlit Secrets."""
     if "gcp_service_account" not in st.secrets:
         st.error("Credenciais do Google (Service Account) não encontradas!")
         return None
     try:
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        if "\\n" in creds_dict["private_key"]:
-            creds_dict["private_key"] = creds_dict["private_key"].replace("\\n", "\n")
-        
-        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-        return gspread.authorize(creds)
+        return _authorize_gspread()
     except Exception as e:
         st.error(f"Erro na autenticação: {e}")
         return None
@@ -228,126 +301,378 @@ def get_gspread_client():
 def get_worksheet_by_name(sh, target_name):
     """Try to find worksheet by name (case-insensitive). Return None if not found."""
     try:
-        titles = [ws.title for ws in sh.worksheets()]
-        best_match = next((t for t in titles if t.strip().lower() == target_name.strip().lower()), None)
-        if best_match:
-            return sh.worksheet(best_match)
-        return None
+        # worksheets() already returns usable handles; sh.worksheet(title) would fetch the metadata again
+        target = target_name.strip().lower()
+        return next((ws for ws in sh.worksheets() if ws.title.strip().lower() == target), None)
     except Exception as e:
         print(f"Erro ao procurar aba: {e}")
         return None
 
-def batch_clear_rows(ws, rows, condition_func):
-    """Efficiently clear rows matching a condition by filtering and overwriting."""
-    if not rows: return 0
-    header = rows[0]
-    new_rows = [header]
-    deleted_count = 0
-    for row in rows[1:]:
-        if not condition_func(row):
-            new_rows.append(row)
-        else:
-            deleted_count += 1
-    if deleted_count > 0:
+@st.cache_resource(show_spinner=False)
+def _cached_worksheet(sheet_url: str, sheet_name: str):
+    ws = get_worksheet_by_name(_authorize_gspread().open_by_url(sheet_url), sheet_name)
+    if ws is None: raise LookupError(sheet_name) # not cached, so a tab created later is found
+    return ws
+
+def forget_worksheets():
+    """Drops the cached handles, e.g. after a failed run (the tab may have been renamed or deleted)."""
+    _cached_worksheet.clear()
+
+def open_worksheet(sheet_url, sheet_name):
+    """Worksheet handle per (sheet, tab), opened once per process instead of on every click. None if the tab is missing."""
+    try: return _cached_worksheet(sheet_url, sheet_name)
+    except LookupError: return None
+
+def read_columns(ws, ranges):
+    """Reads several column ranges (e.g. 'G2:G') in a single values:batchGet call, one flat list per range."""
+    return [vr[0] if vr else [] for vr in ws.batch_get(ranges, major_dimension="COLUMNS")]
+
+SHEETS_RETRY_CODES = (429, 500, 502, 503)
+SHEETS_MAX_RETRIES = 4
+
+def batch_update_reauth(ws, data):
+    """ws.batch_update that re-authorizes once if the cached credentials are rejected mid-run
+    and backs off (1s, 2s, 4s...) on quota/server errors."""
+    attempt, reauthorized = 0, False
+    while True:
+        try: return ws.batch_update(data, value_input_option="RAW")
+        except RefreshError:
+            if reauthorized: raise
+        except APIError as e:
+            if e.code in SHEETS_RETRY_CODES and attempt < SHEETS_MAX_RETRIES:
+                time.sleep(2 ** attempt); attempt += 1; continue
+            if e.code != 401 or reauthorized: raise
+        _authorize_gspread.clear(); forget_worksheets()
+        ws.client = _authorize_gspread().http_client # same worksheet handle, fresh credentials
+        reauthorized = True
+
+DELTA_MERGE_GAP = 3
+
+async def write_column_deltas(ws, columns: dict, sent: dict):
+    """Writes only the runs of cells that changed since the last write, all in one values:batchUpdate.
+
+    The HTTPS call runs in a worker thread so the scraping workers keep going meanwhile.
+
+    columns maps a column letter to its values from row 2 down; sent holds what the sheet already
+    has (seed it with the values read at start) and is updated after a successful write.
+    """
+    data = []
+    for col, values in columns.items():
+        prev = sent.get(col, [])
+        changed = [k for k, v in enumerate(values) if k >= len(prev) or prev[k] != v]
+        # Runs closer than DELTA_MERGE_GAP cells are sent as one range (rewriting the few unchanged
+        # cells in between is cheaper than another ValueRange when workers finish out of order)
+        start = 0
+        for n in range(1, len(changed) + 1):
+            if n == len(changed) or changed[n] - changed[n - 1] > DELTA_MERGE_GAP:
+                i, j = changed[start], changed[n - 1] + 1
+                data.append({"range": f"{col}{2+i}:{col}{1+j}", "values": [[v] for v in values[i:j]]})
+                start = n
+    if data:
+        await asyncio.to_thread(batch_update_reauth, ws, data)
+    for col, values in columns.items(): sent[col] = list(values)
+
+def read_text_columns(ws, ranges):
+    """read_columns padded to a common length, as stripped numpy string arrays (one per range)."""
+    cols = read_columns(ws, ranges)
+    n = max(map(len, cols), default=0)
+    return [np.char.strip(np.array(col + [""] * (n - len(col)), dtype=str)) for col in cols]
+
+def batch_clear_rows(ws, done):
+    """Deletes the data rows flagged in the boolean mask `done` (done[0] is sheet row 2, header kept)
+    with one batchUpdate of deleteDimension ranges."""
+    to_delete = np.flatnonzero(done) + 1 # 0-based sheet rows
+    if not len(to_delete): return 0
+    if len(to_delete) > (len(done) + 1) // 2:
+        # Mostly deletions: rewriting the few remaining rows is the smaller request (only then is the whole sheet read)
+        rows = ws.get_all_values()
+        doomed = set(to_delete.tolist())
         ws.clear()
-        ws.update(range_name='A1', values=new_rows)
-    return deleted_count
+        ws.update(range_name='A1', values=[row for i, row in enumerate(rows) if i not in doomed])
+    else:
+        # Consecutive rows -> [start, end): a new span starts wherever the gap to the previous row is > 1
+        runs = np.split(to_delete, np.flatnonzero(np.diff(to_delete) > 1) + 1)
+        # Bottom-up, so each deletion leaves the indices of the ones still to run untouched
+        ws.spreadsheet.batch_update({"requests": [
+            {"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": int(run[0]), "endIndex": int(run[-1]) + 1}}}
+            for run in reversed(runs)
+        ]})
+    return len(to_delete)
 
 # --- SCRAPERS ---
 
+SIAC_INPUT_SELECTOR = "input[name='searchGtWro'], input[placeholder*='transponder']"
+
+# Sinais de "página pronta" usados em vez de esperas fixas
+# Depois da resposta à pesquisa: espera que o texto mude (se o estado for igual ao do chip anterior, não muda)
+SIAC_RESULT_JS = "([before, texts]) => { const t = document.body.innerText; return t !== before && texts.some(x => t.includes(x)); }"
+SIAC_STATUS_JS = "(texts) => { const t = document.body.innerText; return texts.findIndex(x => t.includes(x)); }"
+# Ordem importa: "desaparecido" também contém o texto de registado
+SIAC_STATUSES = ((SIAC_TEXT_MISSING, "siac_missing"), (SIAC_TEXT_REGISTERED, "siac_registered"), (SIAC_TEXT_NOT_REGISTERED, "siac_not_registered"))
+OLX_GONE_JS_RE = "/já não está disponível|não se encontra disponível|anúncio removido|ups, algo não está bem/i"
+OLX_KM_READY_JS = """
+    () => {
+        const t = (document.body && document.body.innerText) || "";
+        return t.includes('Quilómetros') || %s.test(t);
+    }
+""" % OLX_GONE_JS_RE
+# Removed/inactive ads never get a location link: stop waiting as soon as the notice shows
+OLX_LOCATION_READY_JS = """
+    () => !!document.querySelector('a[data-testid="ad-location-link"]') || %s.test((document.body && document.body.innerText) || "")
+""" % OLX_GONE_JS_RE
+RNAL_READY_SELECTOR = '.TableRecords_Label, tr.GridRow, tr.GridAlternatingRow, :text("não foram encontrados")'
+KM_RE = re.compile(r"(\d[\d\s.,]*)\s*km", re.IGNORECASE)
+NON_DIGIT_RE = re.compile(r"\D+")
+WORD_RE = re.compile(r"\w+")
+# Frases de anúncio indisponível, por ordem de prioridade (moderado antes de inativo)
+OLX_ERROR_RES = (
+    (re.compile(r"já não está disponível|already moderated", re.IGNORECASE), "ERR_MODERATED"),
+    (re.compile(r"ups, algo não está bem|inactive|não se encontra disponível|anúncio removido|removed", re.IGNORECASE), "ERR_INACTIVE"),
+)
+
+def detect_olx_error(text):
+    """Returns the OLX error code for an unavailable-ad page, or None."""
+    for pattern, code in OLX_ERROR_RES:
+        if pattern.search(text): return code
+    return None
+BODY_TEXT_JS = "() => document.body ? document.body.innerText : ''"
+# Chamadas às funções de SCRAPER_HELPERS_JS
+SIAC_FILL_JS = "([sel, v]) => window.__siacFill(sel, v)"
+OLX_LOCATION_JS = "() => window.__olxExtractLocation()"
+RNAL_RECORD_JS = "() => window.__rnalExtractRecord()"
+RNAL_GRID_JS = "() => window.__rnalExtractGrid()"
+
+def extract_km(text: str) -> Optional[str]:
+    """Mileage from the ad's innerText: the value next to "Quilómetros" (same or next 3 lines), else the first "<n> km"."""
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        if "Quilómetros" in line:
+            for candidate in lines[i:i + 4]:
+                m = KM_RE.search(candidate)
+                if m: return m.group(0).strip()
+    m = KM_RE.search(text)
+    return m.group(0).strip() if m else None
+
+# Funções de extracção instaladas uma vez por contexto (add_init_script); cada chamada só envia o nome da função
+SCRAPER_HELPERS_JS = """
+    window.__siacFill = function (sel, value) {
+        const input = document.querySelector(sel);
+        if (!input) return null;
+        input.focus();
+        const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+        setter.call(input, value);
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+        return document.body.innerText;
+    };
+
+    window.__olxExtractLocation = function () {
+        const blacklist = ['LOCALIZAÇÃO', 'MAP DATA', 'CLICK TO TOGGLE', 'METRIC', 'IMPERIAL', 'UNITS', '©', 'LOJA', 'GEOGR'];
+
+        const isMetadata = (text) => {
+            if (!text) return true;
+            const t = text.trim();
+            // Reject if contains distance pattern (e.g. "1 km", "500 m")
+            if (/\\d+.*km/i.test(t) || /\\d+.*m\\s*$/i.test(t)) return true;
+            // Reject if contains blacklist words
+            const up = t.toUpperCase();
+            return blacklist.some(b => up.includes(b));
+        };
+
+        const surgicalExtract = (container) => {
+            if (!container) return null;
+            // Find all direct or deep text nodes/spans
+            const elements = Array.from(container.querySelectorAll('span, a, p'))
+                .map(el => el.innerText.trim())
+                .filter(t => t.length > 2 && !isMetadata(t));
+
+            // Deduplicate and join first 2 unique parts
+            const unique = [...new Set(elements)];
+            if (unique.length > 0) return unique.slice(0, 2).join(' - ');
+            return null;
+        };
+
+        // Priority 1: Direct location link
+        const locLink = document.querySelector('a[data-testid="ad-location-link"]');
+        if (locLink) {
+            const res = surgicalExtract(locLink);
+            if (res) return res;
+        }
+
+        // Priority 2: Section search (fallback). XPath on text content finds the header without
+        // reading innerText (a layout per node) for every span/p/a/div on the page
+        const header = document.evaluate(
+            "//*[self::span or self::p or self::a or self::div or self::h2 or self::h3][translate(normalize-space(.), 'locazinçã', 'LOCAZINÇÃ') = 'LOCALIZAÇÃO']",
+            document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        if (header) {
+            let parent = header.parentElement;
+            // Go up a few levels to find the container
+            for (let i = 0; i < 3 && parent; i++) {
+                const res = surgicalExtract(parent);
+                if (res) return res;
+                parent = parent.parentElement;
+            }
+        }
+
+        return null;
+    };
+
+    window.__rnalExtractRecord = function () {
+        // Start from the labels themselves instead of visiting every <td> on the page
+        const cells = new Set(Array.from(document.querySelectorAll('td .TableRecords_Label')).map(l => l.closest('td')));
+        const parts = [];
+        cells.forEach(td => {
+            const labelDiv = td.querySelector('.TableRecords_Label');
+            const label = labelDiv.innerText.trim();
+            const value = td.innerText.replace(label, '').trim();
+            if (value) parts.push(value);
+        });
+        return parts.length > 2 ? parts.join(' - ') : null;
+    };
+
+    window.__rnalExtractGrid = function () {
+        const row = document.querySelector('tr.GridRow, tr.GridAlternatingRow, .GridView tr:nth-child(2), table tr:nth-child(2)');
+        if (row) {
+            const cells = Array.from(row.querySelectorAll('td'));
+            if (cells.length > 2) {
+                // Usually the location is the second to last column or specific column
+                // We can try to guess or just join relevant info
+                const text = cells.map(c => c.innerText.trim()).filter(t => t.length > 2).join(' | ');
+                // Return the last relevant cell if it's long enough
+                return cells[cells.length - 2].innerText.trim() + " (" + cells[cells.length-3].innerText.trim() + ")";
+            }
+        }
+        // Same round-trip answers the "no results" case
+        return /não foram encontrados/i.test(document.body.innerText) ? "__not_found__" : null;
+    };
+"""
+
+ERROR_LOG_SIZE = 50
+
+async def wait_ready(wait) -> bool:
+    """Awaits a readiness wait whose timeout is only a ceiling: on timeout the caller reads whatever rendered."""
+    try:
+        await wait
+        return True
+    except PlaywrightError: return False
+
+def retry_delay(attempt: int) -> float:
+    """Backoff between checker attempts: 0.5s, 1s, 2s..."""
+    return 0.5 * 2 ** attempt
+
+def log_scrape_error(where: str, target, e: Exception):
+    """Keeps the last scraper errors in the session (ring buffer) so transient failures show up in the UI."""
+    if "errors" not in st.session_state: st.session_state.errors = deque(maxlen=ERROR_LOG_SIZE)
+    msg = str(e).strip().splitlines()[0] if str(e).strip() else ""
+    st.session_state.errors.append(f"{time.strftime('%H:%M:%S')} {where} [{target}] {type(e).__name__}: {msg}")
+
+def is_siac_search_response(response) -> bool:
+    """A document/XHR answer from siac.pt, i.e. the search the Enter press sends."""
+    return response.request.resource_type in ("document", "xhr", "fetch") and (urlparse(response.url).hostname or "").endswith("siac.pt")
+
 async def check_siac_on_page(page, microchip: str, retries: int = 1) -> str:
     """Stable validation for SIAC."""
     for attempt in range(retries + 1):
         try:
-            if SIAC_URL not in page.url:
-                await page.goto(SIAC_URL, timeout=60000, wait_until="networkidle")
-
-            # Clicar no campo de texto (espaço entre as setas) antes de escrever - Aprovado pelo user
-            sel = "input[name='searchGtWro'], input[placeholder*='transponder']"
-            await page.click(sel, timeout=5000)
-            await page.keyboard.press("Control+A")
-            await page.keyboard.press("Backspace")
-            
-            await page.keyboard.type(str(microchip), delay=60)
-            await page.keyboard.press("Enter")
-            await asyncio.sleep(5.0) # Espera estável aprovada
-                
-            content = await page.content()
-            if SIAC_TEXT_MISSING in content: return "siac_missing"
-            if SIAC_TEXT_REGISTERED in content: return "siac_registered"
-            if SIAC_TEXT_NOT_REGISTERED in content: return "siac_not_registered"
+            # Não esperar por networkidle: basta o documento começar a chegar e o campo existir
+            fill_args = [SIAC_INPUT_SELECTOR, str(microchip)]
+            before = None
+            if attempt or SIAC_URL not in page.url:
+                # Retries start from a fresh page, with no earlier result on screen
+                await goto(page, SIAC_URL, timeout=60000, wait_until="commit")
+            else:
+                # Already on the search page from the previous chip: fill straight away
+                try: before = await page.evaluate(SIAC_FILL_JS, fill_args)
+                except PlaywrightError: pass # still navigating; fall back to the selector wait
+            if before is None:
+                await page.wait_for_selector(SIAC_INPUT_SELECTOR, timeout=15000)
+                before = await page.evaluate(SIAC_FILL_JS, fill_args)
+            if before is None: raise PlaywrightError("SIAC input not found")
+            # The page keeps the previous chip's result, so only the answer to this search counts
+            try:
+                async with page.expect_response(is_siac_search_response, timeout=10000):
+                    await page.press(SIAC_INPUT_SELECTOR, "Enter")
+            except PlaywrightTimeoutError: # no answer: whatever is on screen belongs to the previous chip
+                if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
+                return "siac_unknown"
+            # Texto igual depois da resposta = mesmo estado do chip anterior
+            await wait_ready(page.wait_for_function(SIAC_RESULT_JS, arg=[before, [SIAC_TEXT_REGISTERED, SIAC_TEXT_NOT_REGISTERED]], timeout=3000))
+
+            # Classified in the page: only the index of the first matching status comes back
+            status = await page.evaluate(SIAC_STATUS_JS, [text for text, _ in SIAC_STATUSES])
+            if status >= 0: return SIAC_STATUSES[status][1]
             
-            if attempt < retries: await asyncio.sleep(2); continue
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
             return "siac_unknown"
-        except:
-            if attempt < retries: await asyncio.sleep(2); continue
+        except PlaywrightError as e:
+            log_scrape_error("SIAC", microchip, e)
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
             return "⚠️ Erro"
     return "⚠️ Erro"
 
+def olx_ad_url(ad_id) -> str:
+    """Numeric ID, full URL or slug -> ad URL."""
+    ad_id = str(ad_id)
+    if ad_id.isdigit(): return f"{OLX_BASE_URL}{ad_id}"
+    return ad_id if ad_id.startswith('http') else f"{OLX_BASE_URL}d/anuncio/{ad_id}.html"
+
+def olx_km_from_offer(body) -> Optional[str]:
+    """Mileage from an OLX offers JSON body; None for a non-active ad or any unexpected shape."""
+    offer = body.get("data") if isinstance(body, dict) else None
+    if not isinstance(offer, dict) or offer.get("status") not in (None, "active"): return None # removed/moderated: the page has the wording
+    params = offer.get("params")
+    if isinstance(params, dict): # some payloads key the params by name instead of listing them
+        params = [dict(p, key=p.get("key", k)) if isinstance(p, dict) else p for k, p in params.items()]
+    for param in params if isinstance(params, list) else []:
+        if not isinstance(param, dict) or param.get("key") not in ("milage", "mileage"): continue # OLX spells it "milage"
+        value = param.get("value")
+        if isinstance(value, dict):
+            match = KM_RE.search(str(value.get("label") or "").strip())
+            if match: return match.group(0).strip()
+            if str(value.get("key") or "").isdigit(): return f"{value['key']} km"
+        normalized = str(param.get("normalizedValue") or "")
+        if normalized.isdigit(): return f"{normalized} km"
+    return None
+
+async def fetch_olx_km_api(page, ad_id: str) -> Optional[str]:
+    """Mileage from OLX's offers JSON for active ads with a numeric ID; None whenever the page should decide."""
+    if not str(ad_id).isdigit(): return None
+    url = OLX_API_OFFER_URL.format(ad_id)
+    await get_host_throttle().wait(url)
+    response = await page.context.request.get(url, timeout=15000)
+    if not response.ok: return None
+    try: return olx_km_from_offer(await response.json())
+    except ValueError: return None
+
 async def check_olx_km(page, ad_id: str, retries: int = 2) -> str:
     """Validates car mileage on OLX with very robust text-based searching."""
-    if str(ad_id).isdigit():
-        ad_url = f"{OLX_BASE_URL}{ad_id}"
-    else:
-        ad_url = ad_id if str(ad_id).startswith('http') else f"{OLX_BASE_URL}d/anuncio/{ad_id}.html"
+    # JSON API first (no rendering, same cookies/UA); the page below is the fallback
+    try:
+        km_val = await fetch_olx_km_api(page, ad_id)
+        if km_val: return km_val
+    except PlaywrightError as e: log_scrape_error("OLX api", ad_id, e)
+    ad_url = olx_ad_url(ad_id)
 
     for attempt in range(retries + 1):
         try:
-            await page.goto(ad_url, timeout=45000, wait_until="domcontentloaded")
-            await asyncio.sleep(5) 
+            await goto(page, ad_url, timeout=45000, wait_until="commit") # the readiness wait below gates on content
+            await wait_ready(page.wait_for_function(OLX_KM_READY_JS, timeout=8000))
             
-            km_val = await page.evaluate("""
-                () => {
-                    const findInText = (text) => {
-                        const m = text.match(/(\\d[\\d\\s\\.,]*)\\s*km/i);
-                        return m ? m[0].trim() : null;
-                    };
-
-                    const specItems = Array.from(document.querySelectorAll('li, div[data-testid="ad_properties_item"], .ad-properties__item'));
-                    for (const item of specItems) {
-                        const t = item.innerText || "";
-                        if (t.includes('Quilómetros')) {
-                            const val = findInText(t);
-                            if (val) return val;
-                            const children = Array.from(item.querySelectorAll('span, p, div'));
-                            for (const c of children) {
-                                const v = findInText(c.innerText);
-                                if (v) return v;
-                            }
-                        }
-                    }
-
-                    const bodyText = document.body.innerText;
-                    const lines = bodyText.split('\\n');
-                    for (let i = 0; i < lines.length; i++) {
-                        if (lines[i].includes('Quilómetros')) {
-                            for (let j = i; j <= i + 3 && j < lines.length; j++) {
-                                const val = findInText(lines[j]);
-                                if (val) return val;
-                            }
-                        }
-                    }
-
-                    const genericMatch = bodyText.match(/(\\d[\\d\\s\\.,]*)\\s*km/i);
-                    return genericMatch ? genericMatch[0].trim() : null;
-                }
-            """)
+            # One round-trip for the visible text; the km regex runs here instead of in the page
+            body_text = await page.evaluate(BODY_TEXT_JS)
+            km_val = extract_km(body_text)
             if km_val: return km_val
             
-            content = (await page.content()).lower()
-            if "já não está disponível" in content or "already moderated" in content:
-                # We return a specific code or the translated string directly if we want it in Col D
-                # However, to maintain translation in Col D, we must use the t() function inside the checker
-                # but t() is available in the UI loop. Let's return a unique string that the checker maps.
-                return "ERR_MODERATED"
-            if "ups, algo não está bem" in content or "inactive" in content.lower():
-                return "ERR_INACTIVE"
-            if "não se encontra disponível" in content or "anúncio removido" in content or "removed" in content.lower():
-                return "ERR_INACTIVE"
-            if attempt < retries: await asyncio.sleep(2); continue
+            # Same innerText used for km; one regex pass per error class instead of several `in` scans
+            # Returns a code (not translated text) - the UI loop maps it with t()
+            error = detect_olx_error(body_text)
+            if error: return error
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
             return "ERR_NOT_FOUND"
-        except:
-            if attempt < retries: await asyncio.sleep(2); continue
+        except PlaywrightError as e:
+            log_scrape_error("OLX km", ad_id, e)
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
             return "⚠️ Erro Conexão"
     return "⚠️ Erro"
 
@@ -355,139 +680,303 @@ async def check_olx_location(page, ad_id: str, retries: int = 2) -> str:
     """Extracts location from OLX ad."""
     if not ad_id or str(ad_id).lower() == 'nan': return "N/A"
     
-    if str(ad_id).isdigit():
-        ad_url = f"{OLX_BASE_URL}{ad_id}"
-    else:
-        ad_url = ad_id if str(ad_id).startswith('http') else f"{OLX_BASE_URL}d/anuncio/{ad_id}.html"
+    ad_url = olx_ad_url(ad_id)
 
     for attempt in range(retries + 1):
         try:
-            await page.goto(ad_url, timeout=45000, wait_until="domcontentloaded")
-            await asyncio.sleep(4)
+            await goto(page, ad_url, timeout=45000, wait_until="commit")
+            await wait_ready(page.wait_for_function(OLX_LOCATION_READY_JS, timeout=8000))
             
-            location = await page.evaluate("""
-                () => {
-                    const blacklist = ['LOCALIZAÇÃO', 'MAP DATA', 'CLICK TO TOGGLE', 'METRIC', 'IMPERIAL', 'UNITS', '©', 'LOJA', 'GEOGR'];
-                    
-                    const isMetadata = (text) => {
-                        if (!text) return true;
-                        const t = text.trim();
-                        // Reject if contains distance pattern (e.g. "1 km", "500 m")
-                        if (/\\d+.*km/i.test(t) || /\\d+.*m\\s*$/i.test(t)) return true;
-                        // Reject if contains blacklist words
-                        const up = t.toUpperCase();
-                        return blacklist.some(b => up.includes(b));
-                    };
-
-                    const surgicalExtract = (container) => {
-                        if (!container) return null;
-                        // Find all direct or deep text nodes/spans
-                        const elements = Array.from(container.querySelectorAll('span, a, p'))
-                            .map(el => el.innerText.trim())
-                            .filter(t => t.length > 2 && !isMetadata(t));
-                        
-                        // Deduplicate and join first 2 unique parts
-                        const unique = [...new Set(elements)];
-                        if (unique.length > 0) return unique.slice(0, 2).join(' - ');
-                        return null;
-                    };
-
-                    // Priority 1: Direct location link
-                    const locLink = document.querySelector('a[data-testid="ad-location-link"]');
-                    if (locLink) {
-                        const res = surgicalExtract(locLink);
-                        if (res) return res;
-                    }
-
-                    // Priority 2: Section search (fallback)
-                    const all = Array.from(document.querySelectorAll('span, p, a, div, h2, h3'));
-                    const header = all.find(el => el.innerText && el.innerText.trim().toUpperCase() === 'LOCALIZAÇÃO');
-                    if (header) {
-                        let parent = header.parentElement;
-                        // Go up a few levels to find the container
-                        for (let i = 0; i < 3 && parent; i++) {
-                            const res = surgicalExtract(parent);
-                            if (res) return res;
-                            parent = parent.parentElement;
-                        }
-                    }
-                    
-                    return null;
-                }
-            """)
+            location = await page.evaluate(OLX_LOCATION_JS)
             if location: return location
-            if attempt < retries: await asyncio.sleep(2); continue
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
             return "❓ Localização"
-        except:
-            if attempt < retries: await asyncio.sleep(2); continue
+        except PlaywrightError as e:
+            log_scrape_error("OLX loc", ad_id, e)
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt)); continue
             return "⚠️ Conexão"
     return "⚠️ Erro"
 
+class RnalRecordParser(HTMLParser):
+    """Server-side twin of __rnalExtractRecord: text of each <td> holding a .TableRecords_Label, minus its label."""
+    BREAK_TAGS = ("br", "p", "div", "li", "tr") # innerText puts a line break here; without it "Rua A<br>Lisboa" reads "Rua ALisboa"
+    VOID_TAGS = ("area", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr") # never closed
+
+    def __init__(self):
+        super().__init__()
+        self.cells = [] # (label, text) per labelled <td>
+        self.tds = [] # open <td>s: [label parts, text parts, has label]
+        self.label_tag, self.label_depth, self.skip = None, 0, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BREAK_TAGS: self.handle_data("\n")
+        if tag in ("script", "style"): self.skip = True
+        elif tag == "td": self.tds.append([[], [], False])
+        elif self.label_tag:
+            if tag == self.label_tag: self.label_depth += 1
+        elif self.tds and not self.tds[-1][2] and "TableRecords_Label" in (dict(attrs).get("class") or "").split():
+            if tag not in self.VOID_TAGS: self.label_tag, self.label_depth = tag, 1 # a void label has no text to track
+            self.tds[-1][2] = True
+
+    def handle_endtag(self, tag):
+        if tag in self.BREAK_TAGS: self.handle_data("\n")
+        if tag in ("script", "style"): self.skip = False
+        elif self.label_tag and tag == self.label_tag:
+            self.label_depth -= 1
+            if not self.label_depth: self.label_tag = None
+        elif tag == "td" and self.tds:
+            label, text, has_label = self.tds.pop()
+            if has_label: self.cells.append((" ".join("".join(label).split()), " ".join("".join(text).split())))
+
+    def handle_data(self, data):
+        if self.skip or not self.tds: return
+        self.tds[-1][1].append(data)
+        if self.label_tag: self.tds[-1][0].append(data)
+
+    def record(self) -> Optional[str]:
+        parts = [v for v in (text.replace(label, "", 1).strip() for label, text in self.cells) if v]
+        return " - ".join(parts) if len(parts) > 2 else None
+
+async def fetch_rnal_record(page, rnal_url: str) -> Optional[str]:
+    """HTTP-only attempt through the context's request API (same cookies/UA, no rendering); None if it can't tell."""
+    await get_host_throttle().wait(rnal_url)
+    response = await page.context.request.get(rnal_url, timeout=15000)
+    if not response.ok: return None
+    # response.text() is a strict UTF-8 decode; a badly encoded page must not abort the run
+    charset = re.search(r"charset=([\w-]+)", response.headers.get("content-type", ""))
+    body = await response.body()
+    try: html = body.decode(charset.group(1) if charset else "utf-8", errors="replace")
+    except LookupError: html = body.decode("utf-8", errors="replace") # unknown charset name
+    parser = RnalRecordParser()
+    parser.feed(html)
+    return parser.record()
+
 async def check_rnt_rnal_only(page, reg_id: str, retries: int = 1) -> str:
     """Validates registration in RNAL (Direct detail) with grid fallback."""
     res = "❓ Sem Dados"
     rnal_url = f"{RNT_AL_DIRECT_URL}{reg_id}"
+    # The record page is server-rendered: try plain HTTP first, render only if that finds nothing
+    try:
+        record = await fetch_rnal_record(page, rnal_url)
+        if record: return record
+    except PlaywrightError as e: log_scrape_error("RNAL http", reg_id, e)
     for attempt in range(retries + 1):
         try:
-            await page.goto(rnal_url, timeout=45000, wait_until="networkidle")
-            await asyncio.sleep(3) # Give it time to load the record
+            # Continue as soon as the record labels, a search grid or the "not found" message exist,
+            # instead of waiting for networkidle plus a fixed 3s
+            await goto(page, rnal_url, timeout=45000, wait_until="commit")
+            await wait_ready(page.wait_for_selector(RNAL_READY_SELECTOR, timeout=15000))
             
             # New RNAL extraction (per screenshots)
-            for target in [page] + page.frames:
+            for target in page.frames: # main frame first
                 try:
-                    data = await target.evaluate("""
-                        () => {
-                            const cells = Array.from(document.querySelectorAll('td'));
-                            const parts = [];
-                            cells.forEach(td => {
-                                const labelDiv = td.querySelector('.TableRecords_Label');
-                                if (labelDiv) {
-                                    const label = labelDiv.innerText.trim();
-                                    const value = td.innerText.replace(label, '').trim();
-                                    if (value) parts.push(value);
-                                }
-                            });
-                            return parts.length > 2 ? parts.join(' - ') : null;
-                        }
-                    """)
+                    data = await target.evaluate(RNAL_RECORD_JS)
                     if data:
                         res = data
                         break
-                except: continue
+                except PlaywrightError: continue # frame detached mid-navigation
             if res != "❓ Sem Dados": break
                 
             # Fallback: Grid Strategy (if it lands on search results)
-            grid_res = await page.evaluate("""
-                () => {
-                    const row = document.querySelector('tr.GridRow, tr.GridAlternatingRow, .GridView tr:nth-child(2), table tr:nth-child(2)');
-                    if (row) {
-                        const cells = Array.from(row.querySelectorAll('td'));
-                        if (cells.length > 2) {
-                            // Usually the location is the second to last column or specific column
-                            // We can try to guess or just join relevant info
-                            const text = cells.map(c => c.innerText.trim()).filter(t => t.length > 2).join(' | ');
-                            // Return the last relevant cell if it's long enough
-                            return cells[cells.length - 2].innerText.trim() + " (" + cells[cells.length-3].innerText.trim() + ")";
-                        }
-                    }
-                    return null;
-                }
-            """)
+            grid_res = await page.evaluate(RNAL_GRID_JS)
+            if grid_res == "__not_found__":
+                res = "❌ Não Encontrado"
+                break
             if grid_res:
                 res = grid_res
                 break
-
-            if "não foram encontrados" in (await page.content()).lower():
-                res = "❌ Não Encontrado"
-                break
-            if attempt < retries: await asyncio.sleep(2)
-        except: 
-            if attempt < retries: await asyncio.sleep(2)
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt))
+        except PlaywrightError as e:
+            log_scrape_error("RNAL", reg_id, e)
+            if attempt < retries: await asyncio.sleep(retry_delay(attempt))
             else: res = "⚠️ Erro RNAL"
     return res
 
 # --- CORE ENGINE ---
 
+class HostThrottle:
+    """Spaces navigations to the same host at least 1/rate seconds apart, across all workers."""
+    def __init__(self, rates: dict):
+        self.rates = rates
+        self.next_slot = {}
+
+    async def wait(self, url: str):
+        host = urlparse(url).hostname or ""
+        key = next((h for h in self.rates if host == h or host.endswith("." + h)), None)
+        if key is None: return
+        # Reserve the slot before sleeping so concurrent workers queue up behind each other
+        now = time.monotonic()
+        slot = max(now, self.next_slot.get(key, 0.0))
+        self.next_slot[key] = slot + 1.0 / self.rates[key]
+        if slot > now: await asyncio.sleep(slot - now)
+
+@st.cache_resource(show_spinner=False)
+def get_host_throttle() -> HostThrottle:
+    return HostThrottle(HOST_RATE_LIMITS)
+
+async def goto(page, url: str, **kwargs):
+    """page.goto behind the per-host rate limit."""
+    await get_host_throttle().wait(url)
+    return await page.goto(url, **kwargs)
+
+@st.cache_resource(show_spinner=False)
+def get_asset_cache() -> SimpleNamespace:
+    """Static scripts/stylesheets shared by every context: entries url -> (status, headers, body, timestamp), size = total body bytes."""
+    return SimpleNamespace(entries={}, size=0)
+
+async def route_request(route):
+    """Route handler: aborts requests the scrapers never read and serves repeated static assets from memory."""
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS): return await route.abort()
+    if request.method != "GET" or request.resource_type not in CACHED_RESOURCE_TYPES: return await route.continue_()
+
+    assets = get_asset_cache()
+    cached = assets.entries.get(request.url)
+    if cached and time.time() - cached[3] < ASSET_CACHE_TTL:
+        status, headers, body, _ = cached
+        return await route.fulfill(status=status, headers=headers, body=body)
+    try:
+        response = await route.fetch()
+        body = await response.body()
+    except PlaywrightError: return await route.continue_() # let the browser try the network itself
+    # body() is already decoded, so the encoding/length headers no longer apply
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+    cache_control = response.headers.get("cache-control", "").lower()
+    if (response.ok and "no-store" not in cache_control and "private" not in cache_control
+            and assets.size + len(body) <= ASSET_CACHE_MAX_BYTES):
+        # Cookies stay with the context that received them
+        stored = {k: v for k, v in headers.items() if k.lower() not in ASSET_COOKIE_HEADERS}
+        # Replaces an expired copy, or one another worker stored meanwhile
+        previous = assets.entries.get(request.url)
+        assets.entries[request.url] = (response.status, stored, body, time.time())
+        assets.size += len(body) - (len(previous[2]) if previous else 0)
+    await route.fulfill(status=response.status, headers=headers, body=body)
+
+def install_chromium():
+    subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=False)
+
+def ensure_chromium(pw):
+    """Installs the Chromium build this Playwright version expects, unless its executable is already there (called once, from get_engine)."""
+    # An older revision left behind after a playwright upgrade doesn't count
+    if not os.path.exists(pw.chromium.executable_path): install_chromium()
+
+async def launch_browser(pw):
+    try: return await pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+    except PlaywrightError as e:
+        # e.g. only part of the build is present (headless shell missing): install once and retry
+        if "playwright install" not in str(e): raise
+        await asyncio.to_thread(install_chromium)
+        return await pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+
+@st.cache_resource(show_spinner=False)
+def get_engine():
+    """Persistent event loop + Playwright driver + Chromium, shared by every run of this process.
+
+    asyncio.run() would tear down the driver and browser after each button click; keeping
+    them here means only BrowserContexts are created per run.
+    """
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    pw = loop.run_until_complete(async_playwright().start())
+    ensure_chromium(pw)
+    engine = SimpleNamespace(loop=loop, pw=pw, browser=None, run_lock=threading.Lock(), browser_lock=None)
+
+    def shutdown():
+        try:
+            if engine.browser: loop.run_until_complete(engine.browser.close())
+            loop.run_until_complete(pw.stop())
+        except Exception: pass
+    atexit.register(shutdown)
+    return engine
+
+async def ensure_browser(engine):
+    """Returns the shared browser, (re)launching Chromium only if it is missing or died."""
+    if engine.browser_lock is None: engine.browser_lock = asyncio.Lock()
+    async with engine.browser_lock:
+        if engine.browser is None or not engine.browser.is_connected():
+            engine.browser = await launch_browser(engine.pw)
+    return engine.browser
+
+def run_async(coro):
+    """Runs a coroutine to completion on the persistent engine loop (one run at a time)."""
+    try: engine = get_engine()
+    except Exception:
+        coro.close(); raise
+    with engine.run_lock:
+        return engine.loop.run_until_complete(coro)
+
+RESULT_CACHE_TTL = 3600 # segundos (por omissão, e para resultados negativos)
+# Só para resultados positivos: um registo SIAC raramente desaparece; anúncios OLX mudam mais depressa
+RESULT_CACHE_TTLS = {"check_siac_on_page": 7 * 86400, "al_checker": 86400, "cars_checker": 86400}
+# Resultados que podem mudar a qualquer momento (chip registado hoje, anúncio corrigido/reactivado)
+NEGATIVE_RESULTS = ("siac_not_registered", "siac_missing")
+NEGATIVE_MARKS = ("❌", "⚠️")
+STATUS_MIN_INTERVAL = 0.25 # segundos entre actualizações do texto de estado
+
+@st.cache_resource(show_spinner=False)
+def get_storage_states() -> dict:
+    """Cookies/localStorage per checker, saved when a context closes and reused by the next one (also across restarts)."""
+    if os.path.exists(STORAGE_STATE_FILE):
+        try: return read_json(STORAGE_STATE_FILE)
+        except Exception: return {}
+    return {}
+
+def save_storage_states(states: dict):
+    try_write_json(STORAGE_STATE_FILE, states)
+
+def result_ttl(checker_name: str, res) -> float:
+    """Long per-checker TTL for positive results only; negatives are rechecked after RESULT_CACHE_TTL."""
+    values = res if isinstance(res, (tuple, list)) else (res,)
+    if any(str(v) in NEGATIVE_RESULTS or any(m in str(v) for m in NEGATIVE_MARKS) for v in values): return RESULT_CACHE_TTL
+    return RESULT_CACHE_TTLS.get(checker_name, RESULT_CACHE_TTL)
+
+def _tupled(v):
+    return tuple(v) if isinstance(v, list) else v # JSON turns tuple inputs/results into lists
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> dict:
+    """Process-wide memo of checker results: (checker, language, input) -> (result, timestamp), seeded from RESULT_CACHE_FILE."""
+    cache = {}
+    if os.path.exists(RESULT_CACHE_FILE):
+        try:
+            for checker, lang, cleaned, res, ts in read_json(RESULT_CACHE_FILE):
+                cache[(checker, lang, _tupled(cleaned))] = (_tupled(res), ts)
+        except Exception: return {}
+    return cache
+
+def save_result_cache(cache: dict):
+    try_write_json(RESULT_CACHE_FILE, [[*key, res, ts] for key, (res, ts) in list(cache.items())])
+
+def clear_result_cache():
+    """Forgets every memoised result (memory and file), so the next run checks everything again."""
+    get_result_cache().clear()
+    try: os.remove(RESULT_CACHE_FILE)
+    except FileNotFoundError: pass
+
+def is_cacheable(res) -> bool:
+    """Only definitive answers are memoised; connection errors and unknowns are retried next time."""
+    values = res if isinstance(res, (tuple, list)) else (res,)
+    return not any(str(v) in ("...", "siac_unknown") or "Erro" in str(v) or "Conexão" in str(v) or str(v).startswith("❓") for v in values)
+
+TERMINAL_STATES = ("✅", "❌", "🚩")
+
+def has_final_result(res) -> bool:
+    """A row is done when its (last) result carries a terminal mark. Placeholder "..." or empty string doesn't count."""
+    val_to_check = str(res[-1]) if isinstance(res, (tuple, list)) and res else str(res)
+    return any(s in val_to_check for s in TERMINAL_STATES)
+
+def clean_item(val):
+    """Normalises a sheet cell (or tuple of cells) into the hashable value handed to checkers."""
+    if isinstance(val, (tuple, list)): return tuple(val) # Preserve for complex checkers
+    raw_str = str(val).strip()
+    return raw_str[:-2] if raw_str.endswith(".0") else raw_str
+
+def clean_items(items: List[Any]) -> List[Any]:
+    """clean_item over a whole column; plain columns go through one vectorised pandas pass."""
+    if not items or any(isinstance(v, (tuple, list)) for v in items):
+        return [clean_item(v) for v in items]
+    return pd.Series(items, dtype="string").fillna("").str.strip().str.replace(r"\.0$", "", regex=True).tolist()
+
 async def process_list_incremental(
     items: List[Any], 
     checker_func: Callable, 
@@ -496,76 +985,176 @@ async def process_list_incremental(
     callback: Optional[Callable[[List[Any]], Awaitable[None]]] = None, 
     batch_size: int = 10, 
     refresh_every: int = 50,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    flush_interval: float = 5.0,
     **extra_params
 ) -> List[Any]:
+    """Runs checker_func over items with a pool of workers (one BrowserContext each) sharing the engine's browser.
+
+    Partial results are handed to callback by a background task every flush_interval
+    seconds or every batch_size new results, whichever comes first. Checkers flagged
+    with `needs_context = True` receive the worker's BrowserContext instead of its page; a
+    `release_context(context)` attribute, if set, is called when that context is closed.
+    Repeated inputs are scraped once and recent definitive results are reused across runs (and restarts).
+    """
     results: List[Any] = list(existing_results) if existing_results else ["..."] * len(items)
+    st.session_state.errors = deque(maxlen=ERROR_LOG_SIZE)
     progress_bar = st.progress(0)
     status_text = st.empty()
+    total = len(items)
+    
+    # Skip rows that already have a definitive result (mask computed once)
+    to_process = [not has_final_result(r) for r in results]
+    cleaned_items = clean_items(items)
+    # Inputs already answered in another row (e.g. the same chip as mother and offspring)
+    known = {c: results[i] for i, c in enumerate(cleaned_items) if not to_process[i]}
+    pending = {} # cleaned input -> every row index that holds it
+    for i, cleaned in enumerate(cleaned_items):
+        if not to_process[i]: continue
+        check_val = cleaned[0] if isinstance(cleaned, tuple) else cleaned
+        if not str(check_val).strip() or str(check_val).lower() == "nan":
+            # Blank input: answered here, never queued (tuple rows keep their shape)
+            results[i] = ("N/A",) * len(results[i]) if isinstance(results[i], tuple) else "N/A"
+        elif cleaned in known: results[i] = known[cleaned]
+        else: pending.setdefault(cleaned, []).append(i)
+    queue: asyncio.Queue = asyncio.Queue()
+    for entry in pending.items(): queue.put_nowait(entry)
+    done = total - sum(len(idx) for idx in pending.values())
+    cache = get_result_cache()
+    # Drop expired entries so the process-wide memo (and its file) doesn't grow without bound
+    now = time.time()
+    # Snapshot: another session's "clear result cache" may empty the dict meanwhile
+    for key in [k for k, (res, ts) in list(cache.items()) if now - ts >= result_ttl(k[0], res)]: cache.pop(key, None)
+    cache_ns = (getattr(checker_func, "__name__", str(checker_func)), st.session_state.lang)
+    needs_context = getattr(checker_func, "needs_context", False)
+    release_context = getattr(checker_func, "release_context", None)
+    storage_states = get_storage_states()
+    working_fmt = t("status_working") # formatted per item; the translation lookup happens once
+    unflushed, finished = 0, False
+    flush_now = asyncio.Event()
+    crashed_pages = set() # worker pages whose renderer crashed (Playwright doesn't close them)
+    shown_pct = int(100 * done / total) if total else 0
+    status_shown_at = 0.0
+    if total: progress_bar.progress(shown_pct / 100)
     
-    async with async_playwright() as p:
-        browser, context, page = None, None, None
-        async def init_browser():
-            nonlocal browser, context, page
-            if browser: await browser.close()
-            try: 
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage", "--single-process"]
-                )
-            except:
-                os.system("playwright install chromium")
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage", "--single-process"]
-                )
-            context = await browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    engine = get_engine()
+
+    async def open_page():
+        browser = await ensure_browser(engine)
+        # Start "warm": consent cookies and session from an earlier context skip the banner/handshake
+        context = await browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT, storage_state=storage_states.get(cache_ns[0]))
+        try:
+            await context.route("**/*", route_request)
+            await context.add_init_script(SCRAPER_HELPERS_JS)
             page = await context.new_page()
-            if init_url: await page.goto(init_url, timeout=60000, wait_until="networkidle")
-
-        await init_browser()
-        total = len(items)
-        for i, val in enumerate(items):
-            # Skip if we have a result. Placeholder "..." or empty string doesn't count.
-            # Skip if we have a definitive result. Placeholder "..." or empty string doesn't count.
-            terminal_states = ["✅", "❌", "🚩"]
-            val_to_check = str(results[i][-1]) if isinstance(results[i], (tuple, list)) else str(results[i])
-            has_result = any(s in val_to_check for s in terminal_states)
-            if i < len(results) and has_result:
-                progress_bar.progress((i + 1) / total)
-                continue
-
-            if i > 0 and i % refresh_every == 0:
-                status_text.text(t("restarting_browser"))
-                if page: await page.close()
-                if context: await context.close()
-                if browser: await browser.close()
-                await init_browser()
-
-            # Improved Cleaning: Handle tuples/lists vs single values
-            if isinstance(val, (tuple, list)):
-                cleaned = val # Preserve for complex checkers
-                status_display = str(val[0])
-            else:
-                raw_str = str(val).strip()
-                if raw_str.endswith(".0"): cleaned = raw_str[:-2]
-                else: cleaned = raw_str
-                status_display = cleaned
-            
-            check_val = val[0] if isinstance(val, (tuple, list)) else val
-            if not str(check_val).strip() or str(check_val).lower() == "nan": res = "N/A"
-            else:
-                status_text.text(t("status_working", status_display))
-                res = await checker_func(page, cleaned, **extra_params)
-            
-            results[i] = res
-            progress_bar.progress((i + 1) / total)
-            if callback and (i + 1) % batch_size == 0: await callback(results)
-            
-        if callback: await callback(results)
-        if browser: await browser.close()
+            page.on("crash", crashed_pages.add)
+            # Only start the warm-up navigation; the checker's own selector wait covers the rest
+            if init_url: await goto(page, init_url, timeout=60000, wait_until="commit")
+        except BaseException:
+            # Failed or cancelled setup: the browser outlives this run, so don't leave the context behind in it
+            try: await context.close()
+            except PlaywrightError: pass
+            raise
+        return context, page
+
+    async def close_context(context):
+        if release_context: release_context(context)
+        try:
+            storage_states[cache_ns[0]] = await context.storage_state()
+            save_storage_states(storage_states)
+        except PlaywrightError: pass
+        try: await context.close()
+        except PlaywrightError: pass
+
+    async def reset_context(context):
+        await close_context(context)
+        return await open_page()
+
+    async def flusher():
+        # Only the latest snapshot is written; the workers never wait on Sheets
+        nonlocal unflushed
+        while not finished:
+            try: await asyncio.wait_for(flush_now.wait(), timeout=flush_interval)
+            except asyncio.TimeoutError: pass
+            flush_now.clear()
+            if unflushed and not finished:
+                unflushed = 0
+                await callback(list(results))
+
+    async def worker():
+        nonlocal done, unflushed, shown_pct, status_shown_at
+        context, page = await open_page()
+        handled = recycled_at = 0 # checker calls so far / at the last context recycle
+        try:
+            while True:
+                try: cleaned, indices = queue.get_nowait()
+                except asyncio.QueueEmpty: return
+
+                check_val = cleaned[0] if isinstance(cleaned, tuple) else cleaned
+                cached = cache.get((*cache_ns, cleaned))
+                if cached and time.time() - cached[1] < result_ttl(cache_ns[0], cached[0]): res = cached[0]
+                else:
+                    # Each worker recycles its own context to keep memory in check, or replaces it
+                    # straight away if its page crashed (otherwise every later item would just error out).
+                    # Checked only before a real check: cache hits never touch the page
+                    if page.is_closed() or page in crashed_pages or handled - recycled_at >= refresh_every:
+                        status_text.text(t("restarting_browser"))
+                        crashed_pages.discard(page)
+                        context, page = await reset_context(context)
+                        recycled_at = handled
+                    now = time.monotonic()
+                    if now - status_shown_at >= STATUS_MIN_INTERVAL: # at most ~4 status messages/s across workers
+                        status_shown_at = now
+                        status_text.text(working_fmt.format(check_val))
+                    target = context if needs_context else page
+                    res = await checker_func(target, cleaned, **extra_params)
+                    if is_cacheable(res): cache[(*cache_ns, cleaned)] = (res, time.time())
+                    handled += 1
+
+                for i in indices: results[i] = res
+                done += len(indices); unflushed += len(indices)
+                # At most ~100 progress messages per run, however long the list
+                pct = int(100 * done / total)
+                if pct != shown_pct:
+                    shown_pct = pct
+                    progress_bar.progress(pct / 100)
+                if unflushed >= batch_size: flush_now.set()
+        finally:
+            await close_context(context)
+
+    flush_task = asyncio.create_task(flusher()) if callback else None
+    n_workers = max(1, min(concurrency, queue.qsize()))
+    workers = [asyncio.create_task(worker()) for _ in range(n_workers)] if queue.qsize() else []
+    try:
+        try:
+            # The flusher is watched alongside the workers: a failed Sheets write stops the run
+            # straight away instead of scraping the rest of the list with nothing being saved
+            watched = set(workers) | ({flush_task} if flush_task else set())
+            while any(w in watched for w in workers):
+                finished_now, watched = await asyncio.wait(watched, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished_now: task.result() # re-raises a worker's or the flusher's error
+        finally:
+            # If one worker fails, stop its siblings too: the persistent loop only runs during
+            # run_async, so orphaned workers would otherwise resume (and write) during the next run
+            for w in workers: w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            finished = True
+            flush_now.set()
+            if flush_task: await flush_task
+    finally:
+        save_result_cache(cache) # keep what was scraped even if the run failed
+
+    if callback: await callback(results)
+    if st.session_state.errors:
+        with st.expander(t("errors_label", len(st.session_state.errors))):
+            st.code("\n".join(st.session_state.errors))
     return results
 
 # --- UI LOGIC ---
+if clear_cache_clicked:
+    clear_result_cache()
+    st.sidebar.success(t("cache_cleared"))
+
 st.title(t("title"))
 st.markdown(t("subtitle"))
 
@@ -582,49 +1171,43 @@ with tab_siac:
             gc = get_gspread_client()
             if gc:
                 try:
-                    sh = gc.open_by_url(url_gs)
-                    ws = get_worksheet_by_name(sh, "Animais")
+                    ws = open_worksheet(url_gs, "Animais")
                     if not ws:
                         st.error("ERRO: Aba 'Animais' não encontrada no ficheiro!")
                         st.stop()
-                    femeas = ws.col_values(7)[1:] # G
-                    crias = ws.col_values(8)[1:]  # H
-                    res_femeas = ws.col_values(9)[1:] # I
-                    res_crias = ws.col_values(10)[1:] # J
+                    # G (Femea), H (Cria), I/J (resultados) in one request
+                    femeas, crias, res_femeas, res_crias = read_columns(ws, ["G2:G", "H2:H", "I2:I", "J2:J"])
                     
+                    # One row per sheet line, column 0 = femea, column 1 = cria; the mask marks cells that exist
                     rows = max(len(femeas), len(crias))
-                    interleaved = []
-                    existing_results = []
+                    present = np.zeros((rows, 2), dtype=bool)
+                    present[:len(femeas), 0] = True
+                    present[:len(crias), 1] = True
+                    chips = np.full((rows, 2), "", dtype=object)
+                    chips[:len(femeas), 0] = femeas
+                    chips[:len(crias), 1] = crias
+                    prev = np.full((rows, 2), "...", dtype=object)
+                    prev[:min(rows, len(res_femeas)), 0] = res_femeas[:rows]
+                    prev[:min(rows, len(res_crias)), 1] = res_crias[:rows]
+                    # Boolean indexing walks row-major: femea, cria, femea, cria...
+                    interleaved = chips[present].tolist()
+                    existing_results = prev[present].tolist()
                     
-                    for i in range(rows):
-                        # Femea
-                        if i < len(femeas): 
-                            interleaved.append(femeas[i])
-                            existing_results.append(res_femeas[i] if i < len(res_femeas) else "...")
-                        # Cria
-                        if i < len(crias): 
-                            interleaved.append(crias[i])
-                            existing_results.append(res_crias[i] if i < len(res_crias) else "...")
-                    
-                    async def update_siac_gs(res):
-                        ptr, sf, sc = 0, [], []
-                        for i in range(rows):
-                            if i < len(femeas): sf.append([t(res[ptr]) if "siac_" in str(res[ptr]) else res[ptr]]); ptr += 1
-                            else: sf.append(["N/A"])
-                            if i < len(crias): sc.append([t(res[ptr]) if "siac_" in str(res[ptr]) else res[ptr]]); ptr += 1
-                            else: sc.append(["N/A"])
-                        gc_i = get_gspread_client()
-                        if gc_i:
-                            sh_i = gc_i.open_by_url(url_gs)
-                            ws_i = get_worksheet_by_name(sh_i, "Animais")
-                            if ws_i:
-                                ws_i.update(range_name=f"I2:I{1+len(sf)}", values=sf)
-                                ws_i.update(range_name=f"J2:J{1+len(sc)}", values=sc)
+                    sent = {"I": res_femeas, "J": res_crias} # what the sheet already shows
+                    # Status keys -> translated labels, resolved once instead of per cell per flush
+                    labels = {key: t(key) for _, key in SIAC_STATUSES + ((None, "siac_unknown"),)}
+                    async def update_siac_gs(res, ws=ws):
+                        out = np.full((rows, 2), "N/A", dtype=object)
+                        out[present] = np.array([labels.get(r, r) for r in res], dtype=object)
+                        # Only the cells that changed since the previous flush, both columns in one request
+                        await write_column_deltas(ws, {"I": out[:, 0].tolist(), "J": out[:, 1].tolist()}, sent)
 
                     with st.spinner(""):
-                        asyncio.run(process_list_incremental(interleaved, check_siac_on_page, init_url=SIAC_URL, callback=update_siac_gs, existing_results=existing_results))
+                        run_async(process_list_incremental(interleaved, check_siac_on_page, init_url=SIAC_URL, callback=update_siac_gs, existing_results=existing_results, concurrency=concurrency))
                     st.success(t("status_done"))
-                except Exception as e: st.error(f"Erro: {e}")
+                except Exception as e:
+                    forget_worksheets()
+                    st.error(f"Erro: {e}")
 
     # --- BUTTON: CLEAR SIAC ---
     if st.button(t("btn_clear_reg"), key="btns_clear_siac"):
@@ -633,22 +1216,18 @@ with tab_siac:
             try:
                 gc = get_gspread_client()
                 if gc:
-                    sh = gc.open_by_url(url_gs)
-                    ws = get_worksheet_by_name(sh, "Animais")
+                    ws = open_worksheet(url_gs, "Animais")
                     with st.spinner(t("cleaning")):
-                        data = ws.get_all_values()
-                        def is_siac_done(row):
-                            if len(row) < 10: return False
-                            # Exact match only, no alerts. Supports both PT and EN.
-                            res_i = row[8].strip()
-                            res_j = row[9].strip()
-                            reg_labels = ["✅ REGISTADO", "✅ Registered"]
-                            return res_i in reg_labels and res_j in reg_labels
-                        
-                        count = batch_clear_rows(ws, data, is_siac_done)
+                        # Only the result columns are read; the mask is one array comparison per column
+                        res_i, res_j = read_text_columns(ws, ["I2:I", "J2:J"])
+                        # Exact match only, no alerts. Supports both PT and EN.
+                        reg_labels = ["✅ REGISTADO", "✅ Registered"]
+                        count = batch_clear_rows(ws, np.isin(res_i, reg_labels) & np.isin(res_j, reg_labels))
                         if count > 0: st.success(t("rows_removed", count))
                         else: st.info(t("no_rows"))
-            except Exception as e: st.error(f"Erro ao limpar: {e}")
+            except Exception as e:
+                forget_worksheets()
+                st.error(f"Erro ao limpar: {e}")
 
 # --- TAB: RNT ---
 with tab_rnt:
@@ -661,16 +1240,12 @@ with tab_rnt:
             gc = get_gspread_client()
             if gc:
                 try:
-                    sh = gc.open_by_url(url_gs)
-                    ws = get_worksheet_by_name(sh, "Imóveis")
+                    ws = open_worksheet(url_gs, "Imóveis")
                     if not ws:
                         st.error("ERRO: Aba 'Imóveis' não encontrada no ficheiro!")
                         st.stop()
-                    olx_ids = ws.col_values(1)[1:] # A
-                    rnal_ids = ws.col_values(4)[1:] # D
-                    existing_olx_loc = ws.col_values(3)[1:] # C
-                    existing_rnal_data = ws.col_values(5)[1:] # E
-                    existing_val = ws.col_values(6)[1:] # F
+                    # A (OLX ID), D (RNAL nº), C/E/F (resultados) in one request
+                    olx_ids, rnal_ids, existing_olx_loc, existing_rnal_data, existing_val = read_columns(ws, ["A2:A", "D2:D", "C2:C", "E2:E", "F2:F"])
                     
                     # Pad lists
                     max_len = max(len(olx_ids), len(rnal_ids), len(existing_olx_loc), len(existing_rnal_data), len(existing_val))
@@ -686,48 +1261,61 @@ with tab_rnt:
                         # We use existing_val for skipping.
                         combined_existing.append((existing_olx_loc[i], existing_rnal_data[i], existing_val[i]))
                     
-                    async def update_al_gs(results):
+                    sent = {"C": existing_olx_loc, "E": existing_rnal_data, "F": existing_val}
+                    async def update_al_gs(results, ws=ws):
                         # results is a list of (found_olx, found_rnal, ?validation)
-                        gc_u = get_gspread_client()
-                        if gc_u:
-                            sh_u = gc_u.open_by_url(url_gs)
-                            ws_u = get_worksheet_by_name(sh_u, "Imóveis")
-                            if ws_u:
-                                olx_formatted = [[r[0]] for r in results]
-                                rnal_formatted = [[r[1]] for r in results]
-                                val_formatted = []
-                                for r in results:
-                                    # If it already has a thumb/check/flag in the 3rd index, keep it
-                                    if len(r) > 2 and any(s in str(r[2]) for s in ["✅", "❌", "🚩"]):
-                                        val_formatted.append([r[2]])
-                                        continue
-                                        
-                                    olx_l, rnt_l = str(r[0]).lower(), str(r[1]).lower()
-                                    if rnt_l == "n/a" or not rnt_l or "sem dados" in rnt_l:
-                                        val_formatted.append([t("val_waiting")])
-                                    elif str(r[0]) == "..." or str(r[1]) == "..." or any(s in str(r[0]) or s in str(r[1]) for s in ["⚠️", "❓"]):
-                                        val_formatted.append(["..."])
-                                    elif olx_l != "n/a" and any(word in rnt_l for word in olx_l.split() if len(word) > 3): 
-                                        val_formatted.append([t("val_correct")])
-                                    else: val_formatted.append([t("val_wrong")])
-                                    
-                                ws_u.update(range_name=f"C2:C{1+len(olx_formatted)}", values=olx_formatted) # OLX Loc
-                                ws_u.update(range_name=f"E2:E{1+len(rnal_formatted)}", values=rnal_formatted) # RNAL Data
-                                ws_u.update(range_name=f"F2:F{1+len(val_formatted)}", values=val_formatted) # Validation
+                        olx_formatted = [r[0] for r in results]
+                        rnal_formatted = [r[1] for r in results]
+                        val_formatted = []
+                        waiting, correct, wrong = t("val_waiting"), t("val_correct"), t("val_wrong")
+                        for r in results:
+                            # If it already has a thumb/check/flag in the 3rd index, keep it
+                            if len(r) > 2 and any(s in str(r[2]) for s in TERMINAL_STATES):
+                                val_formatted.append(r[2])
+                                continue
+                                
+                            olx_l, rnt_l = str(r[0]).lower(), str(r[1]).lower()
+                            if rnt_l == "n/a" or not rnt_l or "sem dados" in rnt_l:
+                                val_formatted.append(waiting)
+                            elif str(r[0]) == "..." or str(r[1]) == "..." or any(s in str(r[0]) or s in str(r[1]) for s in ["⚠️", "❓"]):
+                                val_formatted.append("...")
+                            elif olx_l != "n/a" and not {w for w in WORD_RE.findall(olx_l) if len(w) > 3}.isdisjoint(WORD_RE.findall(rnt_l)):
+                                # Whole-word overlap: one hashed lookup per RNAL word, and "santa" no longer matches "santarém"
+                                val_formatted.append(correct)
+                            else: val_formatted.append(wrong)
+                            
+                        # C = OLX Loc, E = RNAL Data, F = Validation; changed cells only
+                        await write_column_deltas(ws, {"C": olx_formatted, "E": rnal_formatted, "F": val_formatted}, sent)
                     
-                    async def al_checker(page, ids_tuple):
+                    side_pages = {} # worker context -> its (OLX, RNAL) pages, closed along with the context
+                    crashed_side_pages = set()
+                    async def al_checker(context, ids_tuple):
                         o_id, r_id = ids_tuple
-                        olx_loc = await check_olx_location(page, o_id)
-                        rnt_data = await check_rnt_rnal_only(page, r_id)
+                        # OLX and RNAL are independent hosts: run both on sibling pages at the same time,
+                        # reusing the same two pages for every item the worker handles
+                        pages = side_pages.get(context)
+                        if not pages or any(p.is_closed() or p in crashed_side_pages for p in pages):
+                            for p in pages or (): # replace the pair; the survivor would otherwise stay open until the context closes
+                                crashed_side_pages.discard(p)
+                                try: await p.close()
+                                except PlaywrightError: pass
+                            pages = side_pages[context] = await asyncio.gather(context.new_page(), context.new_page())
+                            for p in pages: p.on("crash", crashed_side_pages.add)
+                        olx_page, rnt_page = pages
+                        olx_loc, rnt_data = await asyncio.gather(check_olx_location(olx_page, o_id), check_rnt_rnal_only(rnt_page, r_id))
                         # Return 3-tuple to match combined_existing format
                         return (olx_loc, rnt_data, "")
+                    al_checker.needs_context = True
+                    al_checker.release_context = lambda context: side_pages.pop(context, None) # no stale closed pages per recycled context
 
                     with st.spinner(""):
                         combined_ids = list(zip(olx_ids, rnal_ids))
-                        asyncio.run(process_list_incremental(combined_ids, al_checker, callback=update_al_gs, existing_results=combined_existing))
+                        run_async(process_list_incremental(combined_ids, al_checker, callback=update_al_gs, existing_results=combined_existing, concurrency=concurrency))
                     st.success(t("status_done"))
                     st.balloons()
-                except Exception as e: st.error(f"Erro: {e}")
+                except Exception as e:
+                    forget_worksheets()
+                    st.error(f"Erro: {e}")
 
     # --- BUTTON: CLEAR RNAL ---
     if st.button(t("btn_clear_loc"), key="btn_clear_rnal"):
@@ -736,18 +1324,15 @@ with tab_rnt:
             try:
                 gc = get_gspread_client()
                 if gc:
-                    sh = gc.open_by_url(url_gs)
-                    ws = get_worksheet_by_name(sh, "Imóveis")
+                    ws = open_worksheet(url_gs, "Imóveis")
                     with st.spinner(t("cleaning")):
-                        data = ws.get_all_values()
-                        def is_rnal_done(row):
-                            if len(row) < 6: return False
-                            return row[5].strip() == t("val_correct")
-                        
-                        count = batch_clear_rows(ws, data, is_rnal_done)
+                        (validation,) = read_text_columns(ws, ["F2:F"])
+                        count = batch_clear_rows(ws, validation == t("val_correct"))
                         if count > 0: st.success(t("rows_removed", count))
                         else: st.info(t("no_rows"))
-            except Exception as e: st.error(f"Erro ao limpar: {e}")
+            except Exception as e:
+                forget_worksheets()
+                st.error(f"Erro ao limpar: {e}")
 
 # --- TAB: OLX ---
 with tab_olx:
@@ -760,15 +1345,12 @@ with tab_olx:
             gc = get_gspread_client()
             if gc:
                 try:
-                    sh = gc.open_by_url(url_gs)
-                    ws = get_worksheet_by_name(sh, "Carros")
+                    ws = open_worksheet(url_gs, "Carros")
                     if not ws:
                         st.error("ERRO: Aba 'Carros' não encontrada no ficheiro!")
                         st.stop()
-                    ids = ws.col_values(1)[1:] # Column A
-                    system_km = ws.col_values(3)[1:] # Col C (User provided)
-                    existing_km = ws.col_values(4)[1:] # Col D (Scraped KM)
-                    existing_val = ws.col_values(5)[1:] # Col E (Validation)
+                    # A (ID), C (KM do user), D (KM lidos), E (Validação) in one request
+                    ids, system_km, existing_km, existing_val = read_columns(ws, ["A2:A", "C2:C", "D2:D", "E2:E"])
                     
                     # Pad lists to ensure same length
                     max_len = max(len(ids), len(system_km), len(existing_km), len(existing_val))
@@ -781,32 +1363,19 @@ with tab_olx:
                     for i in range(max_len):
                         combined_existing.append((existing_km[i], existing_val[i]))
                     
-                    async def update_cars_gs(results):
-                        # results is a list of (found_km, validation)
-                        gc_u = get_gspread_client()
-                        if gc_u:
-                            sh_u = gc_u.open_by_url(url_gs)
-                            ws_u = get_worksheet_by_name(sh_u, "Carros")
-                            if ws_u:
-                                bot_km_fmt = [[r[0]] for r in results]
-                                val_fmt = [[r[1]] for r in results]
-                                ws_u.update(range_name=f"D2:D{1+len(bot_km_fmt)}", values=bot_km_fmt) # Col D
-                                ws_u.update(range_name=f"E2:E{1+len(val_fmt)}", values=val_fmt) # Col E
+                    sent = {"D": existing_km, "E": existing_val}
+                    async def update_cars_gs(results, ws=ws):
+                        # results is a list of (found_km, validation) -> Col D, Col E (changed cells only)
+                        await write_column_deltas(ws, {"D": [r[0] for r in results], "E": [r[1] for r in results]}, sent)
                     
                     async def cars_checker(page, id_val_tuple):
                         ad_id, sys_km_raw = id_val_tuple
                         # Get found KM from OLX
                         found_km_str = await check_olx_km(page, ad_id)
                         
-                        # Compare with sys_km_raw
-                        sys_km = str(sys_km_raw).replace(' ', '').replace('.', '').replace(',', '').strip()
-                        found_km_clean = found_km_str.replace('km', '').replace(' ', '').replace('.', '').replace(',', '').strip().lower()
-                        
+                        # Compare with sys_km_raw (digits only, one regex pass)
+                        sys_km_clean = NON_DIGIT_RE.sub("", str(sys_km_raw))
                         validation = "..."
-                        if sys_km:
-                            sys_km_clean = "".join(filter(str.isdigit, str(sys_km)))
-                        else:
-                            sys_km_clean = ""
 
                         # Map internal codes to translated strings
                         if found_km_str == "ERR_MODERATED":
@@ -821,7 +1390,7 @@ with tab_olx:
                         
                         if validation == "...": # If not already set by error codes
                             if found_km_str != "...":
-                                found_km_clean = "".join(filter(str.isdigit, found_km_str))
+                                found_km_clean = NON_DIGIT_RE.sub("", found_km_str)
                                 
                                 if found_km_clean:
                                     if len(found_km_clean) >= 6:
@@ -842,10 +1411,12 @@ with tab_olx:
                     with st.spinner(""):
                         # Pass zipped list to show Ad ID in status
                         combined = list(zip(ids, system_km))
-                        asyncio.run(process_list_incremental(combined, cars_checker, callback=update_cars_gs, batch_size=10, existing_results=combined_existing))
+                        run_async(process_list_incremental(combined, cars_checker, callback=update_cars_gs, batch_size=10, existing_results=combined_existing, concurrency=concurrency))
                     st.success(t("status_done"))
                     st.balloons()
-                except Exception as e: st.error(f"Erro: {e}")
+                except Exception as e:
+                    forget_worksheets()
+                    st.error(f"Erro: {e}")
 
     # --- BUTTON: CLEAR OLX ---
     if st.button(t("btn_clear_mod"), key="btn_clear_olx"):
@@ -854,26 +1425,16 @@ with tab_olx:
             try:
                 gc = get_gspread_client()
                 if gc:
-                    sh = gc.open_by_url(url_gs)
-                    ws = get_worksheet_by_name(sh, "Carros")
+                    ws = open_worksheet(url_gs, "Carros")
                     with st.spinner(t("cleaning")):
-                        data = ws.get_all_values()
-                        def is_olx_cleanup(row):
-                            if len(row) < 5: return False
-                            status = row[4].strip() # Col E
-                            return any(msg in status for msg in [
-                                "⚠️ Anúncio já foi moderado ⚠️", 
-                                "⚠️ Anúncio inactivo ⚠️",
-                                "⚠️ Ad Already Moderated ⚠️",
-                                "⚠️ Ad Inactive ⚠️",
-                                "✅ KM corrigidos pelo user ✅",
-                                "✅ Kilometers corrected by user ✅"
-                            ])
-                        
-                        count = batch_clear_rows(ws, data, is_olx_cleanup)
+                        (status,) = read_text_columns(ws, ["E2:E"]) # Col E
+                        # The app writes these labels verbatim, so an exact (hashed) match is enough
+                        count = batch_clear_rows(ws, np.isin(status, list(OLX_CLEANUP_LABELS)))
                         if count > 0: st.success(t("rows_removed", count))
                         else: st.info(t("no_rows"))
-            except Exception as e: st.error(f"Erro ao limpar: {e}")
+            except Exception as e:
+                forget_worksheets()
+                st.error(f"Erro ao limpar: {e}")
 
 st.divider()
 st.caption(t("footer"))
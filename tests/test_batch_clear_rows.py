@@ -0,0 +1,76 @@
+import pytest
+
+for module in ("streamlit", "playwright", "gspread", "pandas", "numpy"):
+    pytest.importorskip(module)
+
+import numpy as np
+
+from app import batch_clear_rows
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.bodies = []
+
+    def batch_update(self, body):
+        self.bodies.append(body)
+
+
+class FakeWorksheet:
+    id = 7
+
+    def __init__(self, rows=()):
+        self.rows = [list(row) for row in rows]
+        self.spreadsheet = FakeSpreadsheet()
+        self.cleared = False
+        self.updates = []
+
+    def get_all_values(self):
+        return self.rows
+
+    def clear(self):
+        self.cleared = True
+
+    def update(self, range_name, values):
+        self.updates.append((range_name, values))
+
+
+def spans(ws):
+    [body] = ws.spreadsheet.bodies
+    return [
+        (r["deleteDimension"]["range"]["startIndex"], r["deleteDimension"]["range"]["endIndex"])
+        for r in body["requests"]
+    ]
+
+
+def test_nothing_flagged_sends_nothing():
+    ws = FakeWorksheet()
+    assert batch_clear_rows(ws, np.zeros(5, dtype=bool)) == 0
+    assert ws.spreadsheet.bodies == [] and not ws.cleared
+
+
+def test_flagged_rows_become_bottom_up_delete_spans():
+    # done[0] is sheet row 2 (0-based index 1); flags at 1, 2 and 4 -> sheet rows 3-4 and 6
+    done = np.array([False, True, True, False, True, False, False, False])
+    ws = FakeWorksheet()
+    assert batch_clear_rows(ws, done) == 3
+    assert spans(ws) == [(5, 6), (2, 4)]
+    body = ws.spreadsheet.bodies[0]
+    assert all(r["deleteDimension"]["range"]["sheetId"] == 7 for r in body["requests"])
+    assert all(r["deleteDimension"]["range"]["dimension"] == "ROWS" for r in body["requests"])
+    assert not ws.cleared
+
+
+def test_first_data_row_is_never_the_header():
+    ws = FakeWorksheet()
+    assert batch_clear_rows(ws, np.array([True, False, False, False])) == 1
+    assert spans(ws) == [(1, 2)]
+
+
+def test_mostly_deleted_sheet_is_rewritten_without_the_flagged_rows():
+    rows = [["header"], ["a"], ["b"], ["c"], ["d"], ["beyond the mask"]]
+    ws = FakeWorksheet(rows)
+    assert batch_clear_rows(ws, np.array([True, True, True, False])) == 3
+    assert ws.spreadsheet.bodies == []
+    assert ws.cleared
+    assert ws.updates == [("A1", [["header"], ["d"], ["beyond the mask"]])]
@@ -0,0 +1,40 @@
+import pytest
+
+for module in ("streamlit", "playwright", "gspread", "pandas", "numpy"):
+    pytest.importorskip(module)
+
+from app import extract_km, olx_km_from_offer
+
+MILEAGE = {"key": "milage", "value": {"key": "143940", "label": "143 940 km"}}
+
+
+@pytest.mark.parametrize("body, expected", [
+    ({"data": {"params": [MILEAGE]}}, "143 940 km"),
+    ({"data": {"status": "active", "params": [MILEAGE]}}, "143 940 km"),
+    ({"data": {"params": {"milage": {"value": {"label": "143 940 km"}}}}}, "143 940 km"),
+    ({"data": {"params": [{"key": "mileage", "value": {"key": "1200"}}]}}, "1200 km"),
+    ({"data": {"params": [{"key": "milage", "normalizedValue": "143940"}]}}, "143940 km"),
+    ({"data": {"params": [{"key": "milage", "value": "143 940", "normalizedValue": 143940}]}}, "143940 km"),
+    ({"data": {"params": [{"key": "year", "value": {"key": "2015"}}]}}, None),
+    ({"data": {"params": []}}, None),
+    ({"data": {"status": "removed_by_user", "params": [MILEAGE]}}, None),
+    ({"data": None}, None),
+    ({"data": []}, None),
+    ({"data": {"params": "milage"}}, None),
+    ({"data": {"params": [1, "milage", {"key": "milage", "value": [1]}]}}, None),
+    ([], None),
+    ("not json", None),
+])
+def test_olx_km_from_offer(body, expected):
+    assert olx_km_from_offer(body) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Marca\nBMW\nQuilómetros\n143.940 km\nAno\n2015", "143.940 km"),
+    ("Quilómetros: 98 000 km", "98 000 km"),
+    ("Entrega a 20 km de Lisboa\nQuilómetros\n\n\n55.000 km", "55.000 km"),
+    ("Sem propriedade, mas 12 345 km no texto", "12 345 km"),
+    ("Anúncio sem quilometragem", None),
+])
+def test_extract_km_on_rendered_text(text, expected):
+    assert extract_km(text) == expected
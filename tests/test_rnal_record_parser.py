@@ -0,0 +1,30 @@
+import pytest
+
+for module in ("streamlit", "playwright", "gspread", "pandas", "numpy"):
+    pytest.importorskip(module)
+
+from app import RnalRecordParser
+
+
+def test_br_in_record_cell_keeps_words_apart():
+    parser = RnalRecordParser()
+    parser.feed(
+        '<table><tr>'
+        '<td><div class="TableRecords_Label">Morada</div>Rua A<br>Lisboa</td>'
+        '<td><span class="TableRecords_Label">Nome</span>Casa<br/>Azul</td>'
+        '<td><div class="TableRecords_Label">Concelho</div><p>Lisboa</p></td>'
+        '</tr></table>'
+    )
+    assert parser.record() == "Rua A Lisboa - Casa Azul - Lisboa"
+
+
+def test_void_label_element_does_not_swallow_the_record():
+    parser = RnalRecordParser()
+    parser.feed(
+        '<table><tr>'
+        '<td><img class="TableRecords_Label">Rua A</td>'
+        '<td><input class="TableRecords_Label" value="Nome">Casa Azul</td>'
+        '<td><span class="TableRecords_Label">Concelho</span>Lisboa</td>'
+        '</tr></table>'
+    )
+    assert parser.record() == "Rua A - Casa Azul - Lisboa"
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+for module in ("streamlit", "playwright", "gspread", "pandas", "numpy"):
+    pytest.importorskip(module)
+
+from app import write_column_deltas
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.requests = []
+
+    def batch_update(self, data, value_input_option=None):
+        self.requests.append(data)
+
+
+def write(columns, sent):
+    ws = FakeWorksheet()
+    asyncio.run(write_column_deltas(ws, columns, sent))
+    return ws.requests
+
+
+def test_unchanged_columns_send_nothing():
+    sent = {"C": ["a", "b"]}
+    assert write({"C": ["a", "b"]}, sent) == []
+    assert sent == {"C": ["a", "b"]}
+
+
+def test_runs_within_merge_gap_become_one_range():
+    # rows 2 and 5 changed: the gap is 3, so rows 3-4 are rewritten with their current values
+    requests = write({"C": ["x", "b", "c", "y"]}, {"C": ["a", "b", "c", "d"]})
+    assert requests == [[{"range": "C2:C5", "values": [["x"], ["b"], ["c"], ["y"]]}]]
+
+
+def test_runs_beyond_merge_gap_stay_separate():
+    requests = write({"C": ["x", "b", "c", "d", "y"]}, {"C": ["a", "b", "c", "d", "e"]})
+    assert requests == [[
+        {"range": "C2:C2", "values": [["x"]]},
+        {"range": "C6:C6", "values": [["y"]]},
+    ]]
+
+
+def test_longer_column_appends_only_the_new_rows():
+    requests = write({"C": ["a", "b", "c", "d"]}, {"C": ["a", "b"]})
+    assert requests == [[{"range": "C4:C5", "values": [["c"], ["d"]]}]]
+
+
+def test_all_columns_go_in_one_request_and_sent_is_updated():
+    sent = {"I": ["..."], "J": ["..."]}
+    requests = write({"I": ["ok"], "J": ["no"]}, sent)
+    assert requests == [[
+        {"range": "I2:I2", "values": [["ok"]]},
+        {"range": "J2:J2", "values": [["no"]]},
+    ]]
+    assert sent == {"I": ["ok"], "J": ["no"]}